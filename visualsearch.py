@@ -1,11 +1,20 @@
 import os
 import csv
+import gc
+import json
+import atexit
+import functools
 from math import sin, cos, pi
 import random
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
 from psychopy import visual, core, event, gui
 from psychopy.hardware import keyboard
 
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_TICK_PATH = os.path.join(_HERE, "assets", "tick.png")
+_FAIL_PATH = os.path.join(_HERE, "assets", "fail.png")
 
 """
     Change the settings for the experiment.
@@ -92,15 +101,58 @@ size_of_stimuli = 2
     If you want, here you can change the expected location or name of the `stimuli` folder, or the name of the
     subfolders.
 """
-stimuli_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stimuli')
+stimuli_dir = os.path.join(_HERE, 'stimuli')
 target_stimuli_dir_name = "target"
 distractor_stimuli_dir_name = "distractor"
 
+"""
+    Fraction of the distractor images that will be loaded (between 0 and 1).
+    With large stimuli sets, you can use it to load a random subset of the distractors on each run. By default (`None`),
+    all the distractors are loaded.
+"""
+distractor_load_fraction = None
+
 """
     Full path to file where data will be stored.
     By default, it will be `<Path to visual-search>/data.csv`
 """
-data_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data.csv')
+data_file = os.path.join(_HERE, 'data.csv')
+
+"""
+    Seed for the random choices of the experiment (order of trials, stimuli and positions).
+    Leave it as `None` to get a different sequence on each run, or set an integer to make runs reproducible.
+"""
+random_seed = None
+
+"""
+    Columns of the data file, in the order they are written (see the description of each one in the README).
+"""
+_FIELDNAMES = ('sId', 'age', 'handedness', 'sex', 'run_number', 'target_present', 'set_size', 'radio',
+               'stimuli_rotated', 'fixation_timeout', 'feedback_timeout', 'timestamp', 'correct_answer', 'pressed_key',
+               'response_time', 'response_timed_out')
+
+"""
+    Maximum number of subjects kept in the runs index next to the data file, the least recently run are dropped first.
+"""
+_RUNS_INDEX_SIZE = 10000
+
+"""
+    Stimuli placed for a trial: each image with the position and orientation of every place where it is shown.
+"""
+Placements = Dict[visual.ImageStim, List[Tuple[List[float], float]]]
+
+"""
+    Accepted file extensions for stimuli images (case insensitive).
+"""
+_STIMULI_EXTENSIONS = {'.png', '.jpg'}
+
+
+@functools.lru_cache(maxsize=4)
+def list_images(folder: str) -> Tuple[str, ...]:
+    """ Get the sorted paths of the images in a folder. The listing of each folder is only read once. """
+    with os.scandir(folder) as it:
+        return tuple(sorted(e.path for e in it
+                            if e.is_file() and os.path.splitext(e.name)[1].lower() in _STIMULI_EXTENSIONS))
 
 
 class VisualSearch:
@@ -111,13 +163,39 @@ class VisualSearch:
                  config: Dict,
                  data_file: str,
                  target_present_key: Optional[str] = 'x',
-                 target_not_present_key: Optional[str] = 'm') -> None:
+                 target_not_present_key: Optional[str] = 'm',
+                 load_fraction: Optional[float] = None) -> None:
 
         # Configuration
         self.config = config
         self.data_file = data_file
+        self._runs_index_path = data_file + '.runs.json'
         self.config['RunNumber'] = self.subject_run_number()
 
+        # Random number generators, bound methods are kept to avoid lookups on every trial.
+        rng = random.Random(config.get('seed'))
+        self._choice = rng.choice
+        self._choices = rng.choices
+        self._sample = rng.sample
+        self._randrange = rng.randrange
+        self._rand_f = rng.random
+        self._np_rng = np.random.default_rng(config.get('seed'))
+
+        # Keep the data file open for the whole run.
+        # Results are buffered and written at the end of each block, or when the experiment exits.
+        self._csv_f = open(self.data_file, 'a', newline='', buffering=65536)
+        self._writer = csv.DictWriter(self._csv_f, _FIELDNAMES, extrasaction='ignore')
+        if self._csv_f.tell() == 0:
+            # New file, add header.
+            self._writer.writeheader()
+        self._pending = []
+        atexit.register(self.close_data)
+
+        # Unit circle positions for each set size, rotated and scaled on every trial.
+        self._unit_circle = {}
+        for block in config['blocks']:
+            self._unit_circle_for(block['set_size'])
+
         # Window setup
         self.window = visual.Window(fullscr=True, monitor="testMonitor", units="cm")
         event.globalKeys.add(key='escape', func=core.quit)
@@ -126,72 +204,98 @@ class VisualSearch:
                                          lineWidth=2,
                                          closeShape=False,
                                          lineColor="black")
+        # The fixation never changes, render it once into a full screen image that is drawn as the background.
+        self._fixation_cached = visual.BufferImageStim(self.window, stim=[self.fixation])
         self.tick = visual.ImageStim(win=self.window,
                                      size=2,
-                                     image=os.path.join(os.path.dirname(os.path.abspath(__file__)),
-                                                        "assets",
-                                                        "tick.png"))
+                                     image=_TICK_PATH)
         self.fail = visual.ImageStim(win=self.window,
                                      size=2,
-                                     image=os.path.join(os.path.dirname(os.path.abspath(__file__)),
-                                                        "assets",
-                                                        "fail.png"))
+                                     image=_FAIL_PATH)
+        self.intro = visual.TextStim(self.window, text=config['intro'], wrapWidth=100)
+        self.outro = visual.TextStim(self.window, text=config['outro'], wrapWidth=100)
 
         # Check stimuli directory.
-        self.stimuli = self.load_stimuli(stimuli_dir)
+        self.stimuli = self.load_stimuli(stimuli_dir, load_fraction)
+
+        # One ImageStim per stimulus file, reused across trials so textures are only loaded once.
+        self._stim_pool = {sid: [visual.ImageStim(win=self.window, image=path, size=size_of_stimuli) for path in paths]
+                           for sid, paths in self.stimuli.items()}
 
         # Keyboard setup.
         self.kb = keyboard.Keyboard()
         self.tp_key = target_present_key
         self.ntp_key = target_not_present_key
+        self._key_list = [self.tp_key, self.ntp_key]
+        self._correct_key = {True: self.tp_key, False: self.ntp_key}
+
+        # Result fields shared by the trials of a block, and the settings they were built from.
+        self._template = None
+        self._template_settings = None
 
     def get_image_stim(self, sid: str, n: int, repeat: Optional[bool] = True) -> List[visual.ImageStim]:
-        """ Generate a list of stimuli. """
+        """ Pick a list of stimuli from the pool. With `repeat`, the same stimulus may appear more than once. """
         if repeat:
-            return [visual.ImageStim(win=self.window,
-                                     image=random.choice(self.stimuli[sid]),
-                                     size=size_of_stimuli) for _ in range(n)]
+            return self._choices(self._stim_pool[sid], k=n)
         else:
-            return [visual.ImageStim(win=self.window,
-                                     image=f,
-                                     size=size_of_stimuli) for f in random.sample(self.stimuli[sid], n)]
+            return self._sample(self._stim_pool[sid], n)
 
     def get_target(self) -> List[visual.ImageStim]:
         """ Generate a list with one target stimuli. """
-        return self.get_image_stim("target", 1, repeat=False)
+        return [self._choice(self._stim_pool["target"])]
 
     def get_distractor(self, n: int) -> List[visual.ImageStim]:
         """ Generate a list with n distractor stimuli. """
         return self.get_image_stim("distractor", n)
 
-    def place_stimuli(self, nc: int, is_target_present: bool, r: float, rotated: bool) -> List[visual.ImageStim]:
-        """ Place randomly the stimuli around a circle with radius `r`. """
+    def place_stimuli(self, nc: int, is_target_present: bool, r: float, rotated: bool) -> Placements:
+        """
+            Place randomly the stimuli around a circle with radius `r`.
 
-        stimuli = self.get_target() + self.get_distractor(nc - 1) if is_target_present else self.get_distractor(nc)
-        random.shuffle(stimuli)
+            Stimuli are shared across trials (and may repeat within one), so the positions and orientations of each
+            one are returned grouped by stimulus and only applied when drawing.
+        """
 
-        angle_div = 2 * pi / len(stimuli)
-        rand_offset = random.random() * 2 * pi
+        # Distractors are picked independently, so they are already in random order and only the target needs a
+        # random slot.
+        stimuli = self.get_distractor(nc - 1 if is_target_present else nc)
+        if is_target_present:
+            stimuli.insert(self._randrange(nc), self.get_target()[0])
 
-        for i, s in enumerate(stimuli):
-            angle = angle_div * i + rand_offset
-            s.pos = [r * cos(angle), r * sin(angle)]
-            if rotated:
-                s.ori = random.random() * 360
+        rand_offset = self._rand_f() * 2 * pi
+        rotation = np.array([[cos(rand_offset), -sin(rand_offset)],
+                             [sin(rand_offset), cos(rand_offset)]])
+        positions = r * (self._unit_circle_for(nc) @ rotation.T)
 
-        return stimuli
+        oris = self._np_rng.random(nc) * 360 if rotated else np.zeros(nc)
 
-    def show_items(self, stimuli: List[visual.ImageStim], show_fix: Optional[bool] = True) -> None:
+        placements = {}
+        for s, pos, ori in zip(stimuli, positions.tolist(), oris.tolist()):
+            placements.setdefault(s, []).append((pos, ori))
+        return placements
+
+    def _unit_circle_for(self, n: int) -> np.ndarray:
+        """ Get the positions of `n` stimuli evenly spaced around a unit circle, computed once per set size. """
+        if n not in self._unit_circle:
+            angles = np.arange(n) * 2 * pi / n
+            self._unit_circle[n] = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+        return self._unit_circle[n]
+
+    def show_items(self, placements: Placements, show_fix: Optional[bool] = True) -> None:
         """ Update screen to show the fixation and stimuli. """
-        for s in stimuli:
-            s.draw()
         if show_fix:
-            self.fixation.draw()
+            self._fixation_cached.draw()
+        # All the places of a stimulus are drawn one after the other, so its texture stays bound between draws.
+        for s, places in placements.items():
+            for pos, ori in places:
+                s.pos = pos
+                s.ori = ori
+                s.draw()
         self.window.update()
 
     def show_fixation(self) -> None:
         """ Update screen to show the fixation only. """
-        self.fixation.draw()
+        self._fixation_cached.draw()
         self.window.update()
 
     def show_feedback(self, success: bool) -> None:
@@ -202,21 +306,34 @@ class VisualSearch:
             self.fail.draw()
         self.window.update()
 
-    def show_text_page(self, text: str, blocking: Optional[bool] = True) -> None:
+    def hold_screen(self, show: Callable[[], None], duration: float) -> None:
+        """
+            Keep a screen for `duration` seconds, where `show` draws the screen and updates the window.
+            The screen is redrawn on every frame, timed with a clock that starts when it is first shown. It is shown
+            once more only if that brings the next screen (one frame period later) closer to `duration`.
+        """
+        show()
+        clock = core.Clock()
+        frame_period = 0.0
+        while clock.getTime() + 1.5 * frame_period < duration:
+            start = clock.getTime()
+            show()
+            frame_period = clock.getTime() - start
+
+    def show_text_page(self, text: visual.TextStim, blocking: Optional[bool] = True) -> None:
         """ Show page with some text. """
-        introduction = visual.TextStim(self.window, text=text, wrapWidth=100)
-        introduction.draw()
+        text.draw()
         self.window.update()
         if blocking:
             self.kb.waitKeys()
 
     def show_introduction(self) -> None:
         """ Show page with introduction text. """
-        self.show_text_page(self.config['intro'])
+        self.show_text_page(self.intro)
 
     def show_outro(self) -> None:
-        """ Show page with introduction text. """
-        self.show_text_page(self.config['outro'])
+        """ Show page with final text. """
+        self.show_text_page(self.outro)
 
     def run_trial(self,
                   is_target_present: bool,
@@ -231,41 +348,50 @@ class VisualSearch:
             1. Show fixation screen for a fixed period `fixation_timeout`.
             2. Show a number of items `n_items`, then wait for keyboard response up to a limit `response_timeout`.
             3. Show feedback for a `feedback_timeout`.
+
+            The result fields shared by the trials of a block (see `result_template`) are only built again when the
+            trial settings change.
         """
         # 0. Get items for experiment
-        stimuli = self.place_stimuli(nc=set_size, is_target_present=is_target_present, r=radio, rotated=images_rotate)
-        result = {
-                'sId': self.config['Subject'],
-                'age': self.config['Age'],
-                'handedness': self.config['Handedness'],
-                'sex': self.config['Sex'],
-                'run_number': self.config['RunNumber'],
-                'target_present': is_target_present,
-                'set_size': set_size,
-                'radio': radio,
-                'stimuli_rotated': images_rotate,
-                'fixation_timeout': fixation_timeout,
-                'feedback_timeout': feedback_timeout,
-                'timestamp': core.getAbsTime()
-            }
+        placements = self.place_stimuli(nc=set_size,
+                                        is_target_present=is_target_present,
+                                        r=radio,
+                                        rotated=images_rotate)
+        settings = (set_size, radio, images_rotate, fixation_timeout, feedback_timeout)
+        if settings != self._template_settings:
+            self._template = self.result_template(*settings)
+            self._template_settings = settings
+        result = self._template.copy()
+        result['target_present'] = is_target_present
+        result['timestamp'] = core.getAbsTime()
 
         # 1. Show blank with fixation.
-        self.show_fixation()
-        core.wait(fixation_timeout)
+        self.hold_screen(self.show_fixation, fixation_timeout)
 
         # 2. Redraw now with items, wait for response
-        self.show_items(stimuli)
-        self.kb.clock.reset()
-        keys = self.kb.waitKeys(maxWait=response_timeout, keyList=[self.tp_key, self.ntp_key])
+        # The garbage collector is paused so that it does not run while measuring the response time.
+        # Keys pressed before the stimuli are shown are discarded, and response times are measured from the flip
+        # that shows them.
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            self.kb.clearEvents(eventType='keyboard')
+            self.window.callOnFlip(self.kb.clock.reset)
+            self.show_items(placements)
+            keys = self.kb.waitKeys(maxWait=response_timeout, keyList=self._key_list, waitRelease=False, clear=True)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
 
         correct = False
         if keys:
-            for key in keys:
-                correct = key.name == (self.tp_key if is_target_present else self.ntp_key)
-                result['correct_answer'] = correct
-                result['pressed_key'] = key.name
-                result['response_time'] = key.rt
-                result['response_timed_out'] = False
+            # Only the first key counts as the answer.
+            key = keys[0]
+            correct = key.name == self._correct_key[is_target_present]
+            result['correct_answer'] = correct
+            result['pressed_key'] = key.name
+            result['response_time'] = key.rt
+            result['response_timed_out'] = False
         else:
             result['correct_answer'] = False
             result['pressed_key'] = ''
@@ -273,18 +399,38 @@ class VisualSearch:
             result['response_timed_out'] = True
 
         # 3. Show feedback.
-        self.show_feedback(correct)
-        core.wait(feedback_timeout)
+        self.hold_screen(lambda: self.show_feedback(correct), feedback_timeout)
 
         # 4. Clear the screen.
         self.window.update()
         return result
 
-    def load_stimuli(self, location: str) -> Dict[str, List[str]]:
+    def result_template(self,
+                        set_size: int,
+                        radio: float,
+                        images_rotate: bool,
+                        fixation_timeout: float,
+                        feedback_timeout: float) -> Dict:
+        """ Result entry with the fields that are the same for all the trials of a block. """
+        return {
+                'sId': self.config['Subject'],
+                'age': self.config['Age'],
+                'handedness': self.config['Handedness'],
+                'sex': self.config['Sex'],
+                'run_number': self.config['RunNumber'],
+                'set_size': set_size,
+                'radio': radio,
+                'stimuli_rotated': images_rotate,
+                'fixation_timeout': fixation_timeout,
+                'feedback_timeout': feedback_timeout,
+            }
+
+    def load_stimuli(self, location: str, load_fraction: Optional[float] = None) -> Dict[str, List[str]]:
         """
             Check the stimuli folder and get the files for target and distractors.
+            If `load_fraction` is given, only a random subset of that size of the distractors is kept.
 
-            Accepted file extensions: 'png', 'jpg'
+            Accepted file extensions: 'png', 'jpg' (in upper or lower case)
         """
 
         # Check if location exists.
@@ -293,61 +439,138 @@ class VisualSearch:
         # Check if there is something in the folder.
         target_folder = os.path.join(location, target_stimuli_dir_name)
         distractor_folder = os.path.join(location, distractor_stimuli_dir_name)
-        if not os.path.isdir(target_folder) and os.path.isdir(distractor_folder):
+        if not os.path.isdir(target_folder) or not os.path.isdir(distractor_folder):
             raise ValueError(
-                "Folder {} does not contain stimuli folders {} or {}.".format(
+                "Folder {} does not contain both stimuli folders {} and {}.".format(
                     location,
                     target_stimuli_dir_name,
                     distractor_stimuli_dir_name))
 
         # Now, we can get all images in the folders.
-        stimuli = {"target": [], "distractor": []}
-        for im in os.listdir(target_folder):
-            if im.endswith("png") or im.endswith("jpg"):
-                stimuli["target"].append(os.path.join(target_folder, im))
+        stimuli = {"target": list(list_images(target_folder)), "distractor": list(list_images(distractor_folder))}
 
-        for im in os.listdir(distractor_folder):
-            if im.endswith("png") or im.endswith("jpg"):
-                stimuli["distractor"].append(os.path.join(distractor_folder, im))
+        for sid, folder in (("target", target_folder), ("distractor", distractor_folder)):
+            if not stimuli[sid]:
+                raise ValueError("Folder {} does not contain any stimuli images.".format(folder))
+
+        if load_fraction is not None:
+            if not 0 < load_fraction <= 1:
+                raise ValueError("Invalid load fraction: {}".format(load_fraction))
+            n = max(1, int(len(stimuli["distractor"]) * load_fraction))
+            stimuli["distractor"] = self._sample(stimuli["distractor"], n)
 
         return stimuli
 
     def store_data(self, info: dict) -> None:
-        """ Write entry of CSV file. """
+        """ Add entry to the CSV file, it is written on the next call to `flush_data`. """
+        self._pending.append(info)
+
+    def flush_data(self) -> None:
+        """ Write the pending entries to the CSV file. """
+        if not self._pending:
+            return
+        self._writer.writerows(self._pending)
+        self._csv_f.flush()
+
+        # Keep the runs index up to date, it is stored with the new size of the data file.
+        info = self._pending[-1]
+        if self._runs_index.get(info['sId'], -1) < info['run_number']:
+            self.update_runs_index(info['sId'], info['run_number'])
+        self.store_runs_index()
+        self._pending.clear()
+
+    def close_data(self) -> None:
+        """ Write any pending entries and close the CSV file. """
+        if not self._csv_f.closed:
+            self.flush_data()
+            self._csv_f.close()
+
+    def update_runs_index(self, sid: str, run_number: int) -> None:
+        """ Set the last run of a subject in the index, dropping the least recently run subjects if it is full. """
+        self._runs_index[sid] = run_number
+        self._runs_index.move_to_end(sid)
+        while len(self._runs_index) > _RUNS_INDEX_SIZE:
+            self._runs_index.popitem(last=False)
+
+    def data_file_size(self) -> int:
+        """ Size of the data file in bytes, 0 if it does not exist. """
+        return os.path.getsize(self.data_file) if os.path.isfile(self.data_file) else 0
+
+    def store_runs_index(self) -> None:
+        """
+            Atomically write the index with the last run number of each subject.
+            The size of the data file is stored with it, so the index can be discarded if the data file changes.
+        """
+        tmp_path = self._runs_index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'data_size': self.data_file_size(), 'runs': self._runs_index}, f)
+        os.replace(tmp_path, self._runs_index_path)
+
+    def load_runs_index(self) -> Optional[Dict[str, int]]:
+        """ Read the runs index, or None if there is none or it does not match the current data file. """
+        if not os.path.isfile(self._runs_index_path):
+            return None
+        with open(self._runs_index_path, 'r') as f:
+            index = json.load(f, object_pairs_hook=OrderedDict)
+        if index.get('data_size') != self.data_file_size() or not isinstance(index.get('runs'), dict):
+            # The data file was deleted, replaced or written by another version of this script.
+            return None
+        return index['runs']
+
+    def scan_run_numbers(self) -> Dict[str, int]:
+        """ Read the whole data file to get the last run number of each subject, in the order they were run. """
+        runs = OrderedDict()
         if not os.path.isfile(self.data_file):
-            # Create new file and add header.
-            with open(self.data_file, 'w') as f:
-                writer = csv.DictWriter(f, tuple(info.keys()))
-                writer.writeheader()
-                writer.writerow(info)
-        else:
-            with open(self.data_file, 'a') as f:
-                writer = csv.DictWriter(f, tuple(info.keys()))
-                writer.writerow(info)
+            return runs
+        with open(self.data_file, 'r', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return runs
+            sid_idx, run_idx = header.index('sId'), header.index('run_number')
+            for row in reader:
+                # Files written by older versions of this script on Windows end rows with '\r\r\n', which reads
+                # back as an empty row after each entry.
+                if len(row) <= max(sid_idx, run_idx):
+                    continue
+                sid, run = row[sid_idx], int(row[run_idx])
+                if runs.get(sid, -1) < run:
+                    runs[sid] = run
+                runs.move_to_end(sid)
+        return runs
 
     def subject_run_number(self) -> int:
-        """ Get the last experiment number for a given subject. """
-        if not os.path.isfile(self.data_file):
-            return 0
-        with open(self.data_file, 'r') as f:
-            entries = []
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['sId'] == self.config['Subject']:
-                    entries.append(int(row['run_number']))
-            if len(entries) == 0:
-                return 0
-            else:
-                return max(entries) + 1
-
-    @staticmethod
-    def gen_trials(n: int) -> List[bool]:
         """
-            For a number of trials `n`, create an index of trials where 50% are guaranteed to be positive and 50%
+            Get the next experiment number for a given subject.
+
+            The last run of each subject is kept in an index next to the data file, so the data file is only scanned
+            when there is no valid index (e.g. data recorded with an older version of this script, or a data file that
+            was deleted or replaced), or when the index is full and the subject may have been dropped from it.
+        """
+        sid = self.config['Subject']
+        runs_index = self.load_runs_index()
+        if runs_index is not None:
+            self._runs_index = runs_index
+            if sid in self._runs_index or len(self._runs_index) < _RUNS_INDEX_SIZE:
+                return self._runs_index.get(sid, -1) + 1
+            last_run = self.scan_run_numbers().get(sid, -1)
+        else:
+            runs = self.scan_run_numbers()
+            last_run = runs.get(sid, -1)
+            self._runs_index = OrderedDict()
+            for s, run in runs.items():
+                self.update_runs_index(s, run)
+            self.store_runs_index()
+        return last_run + 1
+
+    def gen_trials(self, n: int) -> np.ndarray:
+        """
+            For a number of trials `n`, create a boolean mask of trials where 50% are guaranteed to be positive and 50%
             negative.
         """
-        trials = [True if i < n // 2 else False for i in range(n)]
-        random.shuffle(trials)
+        trials = np.zeros(n, dtype=bool)
+        trials[:n // 2] = True
+        self._np_rng.shuffle(trials)
         return trials
 
     def run(self) -> None:
@@ -355,15 +578,22 @@ class VisualSearch:
         self.show_introduction()
         for block in self.config['blocks']:
             trials = self.gen_trials(block['repetitions'])
+            set_size = block['set_size']
+            radio = block['radio']
+            images_rotate = block.get('rotate_images', False)
+            feedback_timeout = block.get('feedback_timeout', 3.0)
+            fixation_timeout = block.get('fixation_timeout', 2.0)
+            response_timeout = block.get('response_timeout', float('inf'))
             for t in trials:
                 r = self.run_trial(is_target_present=t,
-                                   set_size=block['set_size'],
-                                   radio=block['radio'],
-                                   images_rotate=block.get('rotate_images', False),
-                                   feedback_timeout=block.get('feedback_timeout', 3.0),
-                                   fixation_timeout=block.get('fixation_timeout', 2.0),
-                                   response_timeout=block.get('response_timeout', float('inf')))
+                                   set_size=set_size,
+                                   radio=radio,
+                                   images_rotate=images_rotate,
+                                   feedback_timeout=feedback_timeout,
+                                   fixation_timeout=fixation_timeout,
+                                   response_timeout=response_timeout)
                 self.store_data(r)
+            self.flush_data()
         self.show_outro()
 
 
@@ -386,5 +616,7 @@ if __name__ == '__main__':
         config['intro'] = introduction_text
         config['outro'] = final_text
 
-        vs = VisualSearch(config=config, data_file=data_file)
+        config['seed'] = random_seed
+
+        vs = VisualSearch(config=config, data_file=data_file, load_fraction=distractor_load_fraction)
         vs.run()